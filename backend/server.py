@@ -1,17 +1,26 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import orjson
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+import numpy as np
 import os
 import logging
 import asyncio
+import calendar
+import collections
+import itertools
 import random
 import math
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
 
 ROOT_DIR = Path(__file__).parent
@@ -31,19 +40,204 @@ system_metrics = {
     'last_update': datetime.now(timezone.utc)
 }
 
+class RequestCounter:
+    """Per-process counter that is bumped without mutating shared state.
+    
+    incr() is a single next() on an itertools.count, which is atomic in
+    CPython. drain() returns the increments since the previous drain; every
+    drain consumes one value of the underlying count, which is accounted for.
+    """
+    
+    def __init__(self):
+        self._count = itertools.count()
+        self._drained = 0
+    
+    def incr(self, n=1):
+        for _ in range(n):
+            next(self._count)
+    
+    def drain(self):
+        value = next(self._count)
+        pending = value - self._drained
+        self._drained = value + 1
+        return pending
+
+# Per-worker counters, flushed every few seconds into one shared db.system_metrics
+# document per wall-clock minute, so the per-minute figures in /health cover all
+# worker processes. Buckets expire through a TTL index after COUNTER_BUCKET_TTL.
+api_requests = RequestCounter()
+database_queries = RequestCounter()
+COUNTER_FLUSH_INTERVAL = 5  # seconds
+COUNTER_BUCKET_TTL = 600  # seconds
+
+def counter_bucket_id(minute):
+    """_id of the counters document for a minute since the epoch"""
+    return f"counters:{minute}"
+
+class VehicleState:
+    """Structure-of-arrays cache of the animated fleet, one row per active vehicle.
+    
+    Rows are addressed through index (vehicle id -> row); arrays grow by
+    doubling and only the first len(self) rows are live. stamp_ms holds the
+    document timestamp the row was last in sync with, so writes by anyone
+    else can be detected and the row reloaded.
+    """
+    
+    COLUMNS = ('pos_xy', 'speed', 'bearing', 'occupancy', 'route_id', 's_along', 'stamp_ms')
+    
+    def __init__(self, capacity=64):
+        self.index = {}
+        self.ids = []
+        self.pos_xy = np.empty((capacity, 2))
+        self.speed = np.empty(capacity)
+        self.bearing = np.empty(capacity)
+        self.occupancy = np.empty(capacity, dtype=np.int64)
+        self.route_id = np.empty(capacity, dtype=object)  # any length, unlike a fixed-width str dtype
+        self.s_along = np.empty(capacity)  # distance along route, NaN until located
+        self.stamp_ms = np.empty(capacity, dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _grow(self):
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.empty((len(old) * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def add(self, vehicle):
+        """Load a vehicle document into its row, appending a row for a new vehicle"""
+        row = self.index.get(vehicle['id'])
+        if row is None:
+            if len(self.ids) == len(self.speed):
+                self._grow()
+            row = len(self.ids)
+            self.index[vehicle['id']] = row
+            self.ids.append(vehicle['id'])
+        self.pos_xy[row] = vehicle['location']['coordinates']
+        self.speed[row] = vehicle['speed']
+        self.bearing[row] = vehicle['bearing']
+        self.occupancy[row] = vehicle['occupancy']
+        self.route_id[row] = vehicle['route_id']
+        self.s_along[row] = np.nan
+        self.stamp_ms[row] = timestamp_ms(vehicle.get('timestamp'))
+    
+    def is_stale(self, vehicle):
+        """Whether a (projected) vehicle document differs from the row loaded for it"""
+        row = self.index[vehicle['id']]
+        return (self.route_id[row] != vehicle['route_id'] or
+                self.stamp_ms[row] != timestamp_ms(vehicle.get('timestamp')))
+    
+    def retain(self, vehicle_ids):
+        """Drop every row whose vehicle is not in vehicle_ids, compacting the arrays"""
+        keep = [self.index[vid] for vid in vehicle_ids if vid in self.index]
+        if len(keep) == len(self.ids):
+            return
+        keep = np.array(sorted(keep), dtype=np.intp)
+        n = len(keep)
+        for name in self.COLUMNS:
+            arr = getattr(self, name)
+            arr[:n] = arr[keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.index = {vid: row for row, vid in enumerate(self.ids)}
+
+def timestamp_ms(value):
+    """A datetime as whole UTC milliseconds, the precision MongoDB stores; -1 when missing.
+    
+    Naive datetimes (what Motor returns by default) are taken to be UTC.
+    """
+    if value is None:
+        return -1
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+
 # Vehicle position cache for smooth animations
-vehicle_positions = {}
+vehicle_positions = VehicleState()
 
 # Route optimization cache
 route_cache = {}
 
+# Routes rarely change: the cache is invalidated by a change stream on db.routes,
+# with a TTL refresh as a fallback in case an event is missed or change streams
+# are unavailable (standalone MongoDB)
+ROUTE_CACHE_TTL = 30  # seconds
+route_cache_expires = 0.0
+
+# Precomputed polyline geometry per route id, rebuilt together with route_cache
+route_geometry = {}
+
+# A dropped change stream is reopened with exponential backoff; only a server
+# without change stream support (standalone, error 40573) stops the watcher
+WATCH_RETRY_SECONDS = 1.0
+MAX_WATCH_RETRY_SECONDS = 60.0
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+# Shared generator for batched random draws on the hot paths
+_RNG = np.random.default_rng()
+
+# Vehicle animation tick and the speed -> degrees-per-tick factor it implies
+# (111320 meters per degree at equator)
+TICK_SECONDS = 2.0
+METERS_PER_DEGREE = 111320.0
+SPEED_TO_DEG_PER_TICK = TICK_SECONDS / (METERS_PER_DEGREE * 3600)
+
+# When no vehicle moves more than MIN_TICK_MOVE degrees in a tick, the
+# position updater skips the write and doubles its sleep up to MAX_TICK_SECONDS
+MIN_TICK_MOVE = 1e-9
+MAX_TICK_SECONDS = 30.0
+
+# The fleet cache is per process, so under several workers only the holder of
+# this lease animates vehicles; the others would overwrite each other's ticks.
+# The lease outlives the longest idle sleep so an idle holder keeps it.
+UPDATER_LEASE_ID = str(uuid.uuid4())
+UPDATER_LEASE_SECONDS = 2 * MAX_TICK_SECONDS
+
+# Serialized responses for the list endpoints: (endpoint, *params) -> (expires, body).
+# Stops and routes are also invalidated by change streams, vehicles by the
+# position updater, so the TTLs only bound staleness if an event is missed.
+# Expired entries are evicted whenever a body is stored; keys are limited to
+# validated /stops limits and known route ids so the cache stays bounded.
+RESPONSE_CACHE_TTL = {"stops": 60, "routes": 60, "vehicles": TICK_SECONDS}
+response_cache = {}
+# One rebuild lock per key, so a slow rebuild of one body never blocks another
+response_cache_locks = {}
+# Bumped by every invalidation of an endpoint, so a rebuild that overlapped
+# one doesn't store (and serve for a full TTL) the body it just invalidated
+response_cache_generation = collections.Counter()
+
+# Largest page /stops serves
+MAX_STOPS_LIMIT = 1000
+
+# Serialized /optimize results: route id -> (expires, body), dropped with route_cache
+OPTIMIZE_CACHE_TTL = 30  # seconds
+optimize_cache = {}
+
+# Upper bound on stops returned by /stops/nearby
+NEARBY_STOPS_LIMIT = 100
+
+# The event loop only keeps weak references to tasks, so the background tasks
+# are held here for as long as they run
+background_tasks = set()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize database with seed data
     await initialize_database()
+    await verify_query_indexes()
+    await refresh_route_cache()
     # Start background tasks
-    asyncio.create_task(update_vehicle_positions())
-    asyncio.create_task(update_system_metrics())
+    for job in (
+        watch_collection(db.routes, on_routes_changed),
+        watch_collection(db.bus_stops, on_stops_changed),
+        update_vehicle_positions(),
+        update_system_metrics(),
+        flush_request_counters(),
+    ):
+        task = asyncio.create_task(job)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
     yield
     # Shutdown: Close database connection
     client.close()
@@ -101,9 +295,25 @@ class SystemHealth(BaseModel):
 
 # Database initialization with realistic seed data
 async def initialize_database():
+    global system_metrics
+    
+    # Build indexes up front, while the collections are still empty (no-ops if they already exist)
+    await asyncio.gather(
+        # 2dsphere indexes for geospatial queries
+        db.bus_stops.create_index([("location", "2dsphere")]),
+        db.vehicles.create_index([("location", "2dsphere")]),
+        # Secondary indexes for the hot vehicle filters
+        db.vehicles.create_index([("status", 1)]),
+        db.vehicles.create_index([("route_id", 1)]),
+        # Expires old per-minute request counter buckets
+        db.system_metrics.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    )
+    
     # Check if data already exists
-    existing_stops = await db.bus_stops.count_documents({})
+    existing_stops = await db.bus_stops.estimated_document_count()
     if existing_stops > 0:
+        # Seed the in-process counter once; the position updater keeps it current
+        system_metrics['active_vehicles'] = await db.vehicles.count_documents({"status": "active"}, hint="status_1")
         return
     
     # Realistic Mumbai bus stops data
@@ -122,10 +332,7 @@ async def initialize_database():
     for stop_data in bus_stops_data:
         stop_data['id'] = str(uuid.uuid4())
         stop_data['accessibility'] = True
-    await db.bus_stops.insert_many(bus_stops_data)
-    
-    # Create 2dsphere index for geospatial queries
-    await db.bus_stops.create_index([("location", "2dsphere")])
+    await db.bus_stops.insert_many(bus_stops_data, ordered=False)
     
     # Routes data with realistic Mumbai routes
     routes_data = [
@@ -185,7 +392,7 @@ async def initialize_database():
     # Insert routes
     for route_data in routes_data:
         route_data['id'] = str(uuid.uuid4())
-    await db.routes.insert_many(routes_data)
+    await db.routes.insert_many(routes_data, ordered=False)
     
     # Get inserted route IDs for vehicles
     routes = await db.routes.find().to_list(None)
@@ -211,67 +418,277 @@ async def initialize_database():
             vehicle['id'] = str(uuid.uuid4())
             vehicles_data.append(vehicle)
     
-    await db.vehicles.insert_many(vehicles_data)
-    await db.vehicles.create_index([("location", "2dsphere")])
+    await db.vehicles.insert_many(vehicles_data, ordered=False)
     
-    global system_metrics
     system_metrics['active_vehicles'] = len(vehicles_data)
     
     logging.info("Database initialized with seed data")
 
+def nearby_stops_pipeline(lng, lat, radius):
+    """Aggregation pipeline for stops within radius (meters), nearest first"""
+    return [
+        {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "distanceField": "distance_m",
+                "maxDistance": radius,
+                "spherical": True,
+                "key": "location"
+            }
+        },
+        {"$limit": NEARBY_STOPS_LIMIT}
+    ]
+
+def plan_uses_index(plan, index_name):
+    """Check whether an explain() plan references the given index anywhere"""
+    if isinstance(plan, dict):
+        if plan.get('indexName') == index_name:
+            return True
+        return any(plan_uses_index(value, index_name) for value in plan.values())
+    if isinstance(plan, list):
+        return any(plan_uses_index(value, index_name) for value in plan)
+    return False
+
+async def verify_query_indexes():
+    """Make sure the hot queries are served by their indexes, not collection scans"""
+    checks = [
+        ("nearby stops", "location_2dsphere",
+         {"aggregate": "bus_stops", "pipeline": nearby_stops_pipeline(72.8777, 19.0760, 1000), "cursor": {}}),
+        ("active vehicles", "status_1", {"find": "vehicles", "filter": {"status": "active"}}),
+        ("vehicles by route", "route_id_1", {"find": "vehicles", "filter": {"route_id": ""}}),
+    ]
+    for name, index_name, command in checks:
+        try:
+            plan = await db.command("explain", command, verbosity="queryPlanner")
+            if not plan_uses_index(plan, index_name):
+                logging.error(f"{name.capitalize()} query is not using the {index_name} index")
+        except Exception as e:
+            logging.error(f"Could not verify {name} query plan: {e}")
+
+async def refresh_route_cache():
+    """Reload all routes into route_cache and reset its TTL"""
+    global route_cache_expires
+    routes = await db.routes.find().to_list(None)
+    route_cache.clear()
+    route_cache.update({route['id']: route for route in routes})
+    optimize_cache.clear()
+    route_geometry.clear()
+    route_geometry.update({
+        route['id']: build_route_geometry(route['coordinates'])
+        for route in routes if route.get('coordinates')
+    })
+    route_cache_expires = time.monotonic() + ROUTE_CACHE_TTL
+
+async def get_cached_routes():
+    """Return cached routes keyed by id, refreshing them once the TTL has expired"""
+    if time.monotonic() >= route_cache_expires:
+        await refresh_route_cache()
+    return route_cache
+
+def invalidate_responses(endpoint):
+    """Drop every cached response of an endpoint"""
+    response_cache_generation[endpoint] += 1
+    for key in [key for key in response_cache if key[0] == endpoint]:
+        del response_cache[key]
+
+def evict_expired_responses(now):
+    """Drop expired cached bodies, and the locks of keys nobody is rebuilding"""
+    for key in [key for key, (expires, _) in response_cache.items() if expires <= now]:
+        del response_cache[key]
+        lock = response_cache_locks.get(key)
+        if lock is not None and not lock.locked():
+            del response_cache_locks[key]
+
+async def cached_json_response(key, build):
+    """Serve a cached JSON body for key, rebuilding it with build() once expired"""
+    entry = response_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        lock = response_cache_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have rebuilt it while we waited for the lock
+            entry = response_cache.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                database_queries.incr()
+                generation = response_cache_generation[key[0]]
+                body = await build()
+                now = time.monotonic()
+                evict_expired_responses(now)
+                if response_cache_generation[key[0]] != generation:
+                    # Invalidated mid-build: serve this body once, but don't cache it
+                    return Response(body, media_type="application/json")
+                entry = (now + RESPONSE_CACHE_TTL[key[0]], body)
+                response_cache[key] = entry
+    return Response(entry[1], media_type="application/json")
+
+async def on_routes_changed():
+    await refresh_route_cache()
+    invalidate_responses("routes")
+
+async def on_stops_changed():
+    invalidate_responses("stops")
+
+# Background task to invalidate in-memory caches on any change to a collection
+async def watch_collection(collection, on_change):
+    delay = WATCH_RETRY_SECONDS
+    reopened = False
+    while True:
+        try:
+            async with collection.watch() as stream:
+                delay = WATCH_RETRY_SECONDS
+                if reopened:
+                    # Events may have been missed while the stream was down
+                    await on_change()
+                async for _ in stream:
+                    await on_change()
+        except Exception as e:
+            if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_UNSUPPORTED:
+                # Change streams need a replica set; the TTL refresh keeps the caches fresh without them
+                logging.warning(f"Change stream on {collection.name} unavailable, falling back to TTL refresh: {e}")
+                return
+            logging.error(f"Change stream on {collection.name} failed, retrying in {delay:g}s: {e}")
+        reopened = True
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, MAX_WATCH_RETRY_SECONDS)
+
+async def acquire_updater_lease():
+    """Take or renew the position updater lease; False while another worker holds it"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.leases.find_one_and_update(
+            {"_id": "vehicle_updater", "$or": [{"owner": UPDATER_LEASE_ID}, {"expires": {"$lt": now}}]},
+            {"$set": {"owner": UPDATER_LEASE_ID, "expires": now + timedelta(seconds=UPDATER_LEASE_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The lease document exists and is held by a live worker
+        return False
+
 # Background task to update vehicle positions for smooth animation
 async def update_vehicle_positions():
+    delay = TICK_SECONDS
     while True:
         try:
-            vehicles = await db.vehicles.find({"status": "active"}).to_list(None)
+            fleet = vehicle_positions
+            max_move = 0.0
             
-            for vehicle in vehicles:
-                # Get route coordinates
-                route = await db.routes.find_one({"id": vehicle['route_id']})
-                if not route:
-                    continue
-                    
-                # Move vehicle along route with realistic speed
-                current_coords = vehicle['location']['coordinates']
-                route_coords = route['coordinates']
+            # Only ids, routes and timestamps are read every tick; full documents are loaded
+            # for new vehicles and for any whose route or timestamp was changed by someone else
+            active = await db.vehicles.find(
+                {"status": "active"}, {"_id": 0, "id": 1, "route_id": 1, "timestamp": 1}
+            ).to_list(None)
+            system_metrics['active_vehicles'] = len(active)
+            
+            if not await acquire_updater_lease():
+                # Another worker animates the fleet; drop our copy so it is reloaded on takeover
+                fleet.retain([])
+                await asyncio.sleep(TICK_SECONDS)
+                continue
+            
+            fleet.retain([v['id'] for v in active])
+            stale = [v['id'] for v in active if v['id'] not in fleet.index or fleet.is_stale(v)]
+            if stale:
+                for vehicle in await db.vehicles.find({"id": {"$in": stale}}).to_list(None):
+                    fleet.add(vehicle)
+            
+            n = len(fleet)
+            if n:
+                await get_cached_routes()
                 
-                # Find next position along route
-                next_coords = get_next_position(current_coords, route_coords, vehicle['speed'])
+                # Move the whole fleet at once, straight from the cached arrays
+                next_coords, bearings, progress, moved = advance_vehicles(
+                    fleet.pos_xy[:n], fleet.s_along[:n], fleet.speed[:n], fleet.route_id[:n], route_geometry
+                )
+                rows = np.flatnonzero(moved)
+                if len(rows):
+                    max_move = float(np.abs(next_coords[rows] - fleet.pos_xy[rows]).max())
+                fleet.pos_xy[rows] = next_coords[rows]
+                fleet.bearing[rows] = bearings[rows]
+                fleet.s_along[:n] = progress
+                fleet.speed[rows] *= _RNG.uniform(0.8, 1.2, size=len(rows))
+                fleet.occupancy[rows] = np.maximum(0, fleet.occupancy[rows] + _RNG.integers(-2, 4, size=len(rows)))
                 
-                # Update vehicle position
-                await db.vehicles.update_one(
-                    {"id": vehicle['id']},
-                    {
-                        "$set": {
-                            "location.coordinates": next_coords,
-                            "bearing": calculate_bearing(current_coords, next_coords),
-                            "timestamp": datetime.now(timezone.utc),
-                            "speed": random.uniform(vehicle['speed'] * 0.8, vehicle['speed'] * 1.2),
-                            "occupancy": max(0, vehicle['occupancy'] + random.randint(-2, 3))
+                # Push the whole tick in one round trip, stamped with a single tick time
+                now = datetime.now(timezone.utc)
+                updates = [
+                    UpdateOne(
+                        {"id": fleet.ids[row]},
+                        {
+                            "$set": {
+                                "location.coordinates": fleet.pos_xy[row].tolist(),
+                                "bearing": float(fleet.bearing[row]),
+                                "timestamp": now,
+                                "speed": float(fleet.speed[row]),
+                                "occupancy": int(fleet.occupancy[row])
+                            }
                         }
-                    }
-                )
+                    )
+                    for row in rows
+                ]
                 
-            await asyncio.sleep(2)  # Update every 2 seconds for smooth animation
+                # Not worth a write when nothing visibly moved
+                if updates and max_move >= MIN_TICK_MOVE:
+                    await db.vehicles.bulk_write(updates, ordered=False)
+                    fleet.stamp_ms[rows] = timestamp_ms(now)
+                    invalidate_responses("vehicles")
+            
+            # Update every 2 seconds for smooth animation, backing off while the fleet is idle
+            if max_move < MIN_TICK_MOVE:
+                delay = min(delay * 2, MAX_TICK_SECONDS)
+            else:
+                delay = TICK_SECONDS
+            await asyncio.sleep(delay)
             
         except Exception as e:
             logging.error(f"Error updating vehicle positions: {e}")
             await asyncio.sleep(5)
 
+# Background task to publish this worker's request counters to the shared per-minute buckets
+async def flush_request_counters():
+    while True:
+        await asyncio.sleep(COUNTER_FLUSH_INTERVAL)
+        
+        minute = int(time.time() // 60)
+        request_count, query_count = api_requests.drain(), database_queries.drain()
+        try:
+            # Nothing to add is not worth a write
+            if request_count or query_count:
+                await db.system_metrics.update_one(
+                    {"_id": counter_bucket_id(minute)},
+                    {
+                        "$inc": {"api_requests": request_count, "database_queries": query_count},
+                        "$setOnInsert": {
+                            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=COUNTER_BUCKET_TTL)
+                        }
+                    },
+                    upsert=True
+                )
+        except Exception as e:
+            # Keep the drained counts for the next flush
+            api_requests.incr(request_count)
+            database_queries.incr(query_count)
+            logging.error(f"Error flushing request counters: {e}")
+        
+        try:
+            # Report the last complete minute
+            last = await db.system_metrics.find_one({"_id": counter_bucket_id(minute - 1)}) or {}
+            system_metrics['api_requests'] = last.get('api_requests', 0)
+            system_metrics['database_queries'] = last.get('database_queries', 0)
+        except Exception as e:
+            logging.error(f"Error reading request counters: {e}")
+
 # Background task to update system metrics
 async def update_system_metrics():
     while True:
         try:
             global system_metrics
             
-            # Update active vehicles count
-            active_count = await db.vehicles.count_documents({"status": "active"})
-            system_metrics['active_vehicles'] = active_count
+            # active_vehicles is maintained by the position updater
             system_metrics['last_update'] = datetime.now(timezone.utc)
             
             # Simulate some realistic fluctuations
-            system_metrics['api_requests'] += random.randint(1, 5)
-            system_metrics['database_queries'] += random.randint(2, 8)
+            api_requests.incr(random.randint(1, 5))
+            database_queries.incr(random.randint(2, 8))
             
             await asyncio.sleep(30)  # Update every 30 seconds
             
@@ -279,158 +696,216 @@ async def update_system_metrics():
             logging.error(f"Error updating system metrics: {e}")
             await asyncio.sleep(60)
 
-def get_next_position(current_coords, route_coords, speed_kmh):
-    """Calculate next position along route based on speed"""
-    # Convert speed to degrees per second (rough approximation)
-    speed_deg_per_sec = (speed_kmh / 111320) / 3600  # 111320 meters per degree at equator
-    
-    # Find closest point on route
-    min_dist = float('inf')
-    closest_idx = 0
-    
-    for i, coord in enumerate(route_coords):
-        dist = calculate_distance(current_coords, coord)
-        if dist < min_dist:
-            min_dist = dist
-            closest_idx = i
-    
-    # Move towards next point on route
-    if closest_idx < len(route_coords) - 1:
-        target = route_coords[closest_idx + 1]
-    else:
-        target = route_coords[0]  # Loop back to start
-    
-    # Calculate direction and move
-    dx = target[0] - current_coords[0]
-    dy = target[1] - current_coords[1]
-    distance = math.sqrt(dx*dx + dy*dy)
-    
-    if distance > 0:
-        # Normalize and scale by speed
-        move_x = (dx / distance) * speed_deg_per_sec * 2  # *2 for 2-second intervals
-        move_y = (dy / distance) * speed_deg_per_sec * 2
+def build_route_geometry(coordinates):
+    """Precompute the arc-length table of a route polyline.
+    
+    The route is treated as a closed loop (last point joins the first) so that
+    vehicles wrap around to the start. Returns the loop points, the cumulative
+    distance at each point, the bearing of each segment and the route's
+    cheap-ruler km-per-degree scale.
+    """
+    points = np.asarray(coordinates, dtype=np.float64)
+    coords = np.vstack([points, points[:1]])
+    seg = np.diff(coords, axis=0)
+    seglen = np.hypot(seg[:, 0], seg[:, 1])
+    kx, ky = cheap_ruler_scale(points[:, 1].mean())
+    return {
+        "coords": coords,
+        "cum": np.concatenate([[0.0], np.cumsum(seglen)]),
+        "bearings": (np.degrees(np.arctan2(seg[:, 0], seg[:, 1])) + 360) % 360,
+        "kx": kx,
+        "ky": ky,
+    }
+
+def cheap_ruler_scale(lat0):
+    """Kilometers per degree of longitude and latitude around latitude lat0.
+    
+    Routes span a few km, so a flat projection with these factors is accurate
+    enough for local distances and needs no trigonometry per point.
+    """
+    return 111.32 * math.cos(math.radians(lat0)), 110.57
+
+def locate_on_route(points, geometry):
+    """Project (N, 2) points onto a route and return their distance along it"""
+    cum = geometry["cum"]
+    scale = np.array([geometry["kx"], geometry["ky"]])
+    coords = geometry["coords"] * scale
+    start = coords[:-1]
+    seg = coords[1:] - start
+    seglen_sq = (seg ** 2).sum(-1)
+    
+    # Closest point on every segment for every vehicle (in cheap-ruler km), then keep the nearest segment
+    rel = points[:, None, :] * scale - start[None, :, :]
+    t = np.divide((rel * seg[None, :, :]).sum(-1), seglen_sq,
+                  out=np.zeros((len(points), len(seg))), where=seglen_sq > 0)
+    t = np.clip(t, 0.0, 1.0)
+    dist_sq = ((rel - t[..., None] * seg[None, :, :]) ** 2).sum(-1)
+    nearest = dist_sq.argmin(axis=1)
+    rows = np.arange(len(points))
+    return cum[nearest] + t[rows, nearest] * np.diff(cum)[nearest]
+
+def advance_vehicles(current, progress, speeds, route_ids, geometries):
+    """Move every vehicle one tick along its route in a single vectorized pass.
+    
+    current is an (N, 2) array of [lng, lat], progress holds each vehicle's
+    distance along its route (NaN if not yet known), speeds and route_ids are
+    length N and geometries maps route id to build_route_geometry() output.
+    Returns the new positions, bearings, progress and a mask of vehicles whose
+    route was found.
+    """
+    next_coords = current.copy()
+    bearings = np.zeros(len(current))
+    progress = progress.copy()
+    moved = np.zeros(len(current), dtype=bool)
+    
+    step = speeds * SPEED_TO_DEG_PER_TICK
+    
+    for route_id in np.unique(route_ids):
+        geometry = geometries.get(route_id)
+        if geometry is None:
+            continue
         
-        new_x = current_coords[0] + move_x
-        new_y = current_coords[1] + move_y
+        idx = np.flatnonzero(route_ids == route_id)
+        coords, cum = geometry["coords"], geometry["cum"]
+        length = cum[-1]
         
-        return [new_x, new_y]
+        # Vehicles seen for the first time are snapped onto the route once
+        unknown = idx[np.isnan(progress[idx])]
+        if len(unknown):
+            progress[unknown] = locate_on_route(current[unknown], geometry)
+        
+        if length > 0:
+            progress[idx] = (progress[idx] + step[idx]) % length
+        s = progress[idx]
+        
+        next_coords[idx, 0] = np.interp(s, cum, coords[:, 0])
+        next_coords[idx, 1] = np.interp(s, cum, coords[:, 1])
+        seg = np.clip(np.searchsorted(cum, s, side="right") - 1, 0, len(geometry["bearings"]) - 1)
+        bearings[idx] = geometry["bearings"][seg]
+        moved[idx] = True
     
-    return current_coords
-
-def calculate_distance(coord1, coord2):
-    """Calculate distance between two coordinates"""
-    dx = coord1[0] - coord2[0]
-    dy = coord1[1] - coord2[1]
-    return math.sqrt(dx*dx + dy*dy)
+    return next_coords, bearings, progress, moved
 
-def calculate_bearing(coord1, coord2):
-    """Calculate bearing between two coordinates"""
-    dx = coord2[0] - coord1[0]
-    dy = coord2[1] - coord1[1]
-    bearing = math.atan2(dx, dy) * 180 / math.pi
-    return (bearing + 360) % 360
+def predict_positions(progress, speed_kmh, geometry, count):
+    """Positions after each of the next count ticks, starting at distance progress along the route"""
+    coords, cum = geometry["coords"], geometry["cum"]
+    s_next = progress + np.arange(1, count + 1) * (speed_kmh * SPEED_TO_DEG_PER_TICK)
+    if cum[-1] > 0:
+        s_next %= cum[-1]
+    xs = np.interp(s_next, cum, coords[:, 0])
+    ys = np.interp(s_next, cum, coords[:, 1])
+    return list(zip(xs.tolist(), ys.tolist()))
 
 # API Endpoints
 @api_router.get("/")
 async def root():
-    global system_metrics
-    system_metrics['api_requests'] += 1
+    api_requests.incr()
     return {"message": "NagaraTrack Lite API - Advanced Bus Tracking System"}
 
-@api_router.get("/stops", response_model=List[BusStop])
-async def get_bus_stops(limit: int = 100):
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
+@api_router.get("/stops", response_class=ORJSONResponse)
+async def get_bus_stops(limit: int = Query(100, ge=1, le=MAX_STOPS_LIMIT)):
+    api_requests.incr()
+    
+    async def build():
+        stops = await db.bus_stops.find({}, {"_id": 0}).limit(limit).to_list(None)
+        return orjson.dumps(stops)
     
-    stops = await db.bus_stops.find().limit(limit).to_list(None)
-    return [BusStop(**stop) for stop in stops]
+    return await cached_json_response(("stops", limit), build)
 
-@api_router.get("/stops/nearby")
+@api_router.get("/stops/nearby", response_class=ORJSONResponse)
 async def get_nearby_stops(lng: float, lat: float, radius: int = 1000):
     """Get stops within radius (meters) of a location"""
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
-    
-    stops = await db.bus_stops.find({
-        "location": {
-            "$near": {
-                "$geometry": {"type": "Point", "coordinates": [lng, lat]},
-                "$maxDistance": radius
-            }
-        }
-    }).to_list(None)
+    api_requests.incr()
+    database_queries.incr()
     
-    return [BusStop(**stop) for stop in stops]
+    stops = await db.bus_stops.aggregate(nearby_stops_pipeline(lng, lat, radius)).to_list(None)
+    for stop in stops:
+        stop.pop('_id', None)
+    
+    return stops
 
-@api_router.get("/routes", response_model=List[Route])
+@api_router.get("/routes", response_class=ORJSONResponse)
 async def get_routes():
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
+    api_requests.incr()
     
-    routes = await db.routes.find().to_list(None)
-    return [Route(**route) for route in routes]
+    async def build():
+        routes = await db.routes.find({}, {"_id": 0}).to_list(None)
+        return orjson.dumps(routes)
+    
+    return await cached_json_response(("routes",), build)
 
-@api_router.get("/routes/{route_id}/optimize")
+@api_router.get("/routes/{route_id}/optimize", response_class=ORJSONResponse)
 async def optimize_route(route_id: str):
     """Get optimized route with traffic considerations"""
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
+    api_requests.incr()
+    
+    # Cached results are dropped together with the routes whenever route_cache is refreshed
+    cached_routes = await get_cached_routes()
+    cached = optimize_cache.get(route_id)
+    if cached and cached[0] > time.monotonic():
+        return Response(cached[1], media_type="application/json")
     
-    route = await db.routes.find_one({"id": route_id})
+    database_queries.incr()
+    route = cached_routes.get(route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
     
     # Simulate route optimization (in real app, this would use traffic APIs)
-    optimized_coords = route['coordinates'].copy()
+    # np.array copies, so the cached route is left untouched
+    optimized_coords = np.array(route['coordinates'], dtype=np.float64)
     
-    # Add some realistic optimization (slight route adjustments)
-    for i in range(1, len(optimized_coords) - 1):
-        # Add small random variations to simulate traffic optimization
-        optimized_coords[i][0] += random.uniform(-0.001, 0.001)
-        optimized_coords[i][1] += random.uniform(-0.001, 0.001)
+    # Add some realistic optimization (slight route adjustments): small random
+    # variations on every intermediate point to simulate traffic optimization
+    inner = optimized_coords[1:-1]
+    inner += _RNG.uniform(-0.001, 0.001, size=inner.shape)
     
     # Simulate improved metrics
     optimized_time = int(route['estimated_time'] * random.uniform(0.85, 0.95))
     traffic_score = random.uniform(0.6, 1.0)
     
-    return {
+    body = orjson.dumps({
         "route_id": route_id,
         "original_coordinates": route['coordinates'],
         "optimized_coordinates": optimized_coords,
         "time_saved": route['estimated_time'] - optimized_time,
         "traffic_score": traffic_score,
         "optimization_applied": True
-    }
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+    optimize_cache[route_id] = (time.monotonic() + OPTIMIZE_CACHE_TTL, body)
+    
+    return Response(body, media_type="application/json")
 
-@api_router.get("/vehicles", response_model=List[Vehicle])
+@api_router.get("/vehicles", response_class=ORJSONResponse)
 async def get_vehicles(route_id: Optional[str] = None):
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
+    api_requests.incr()
     
     query = {}
     if route_id:
         query["route_id"] = route_id
     
-    vehicles = await db.vehicles.find(query).to_list(None)
-    return [Vehicle(**vehicle) for vehicle in vehicles]
+    async def build():
+        vehicles = await db.vehicles.find(query, {"_id": 0}).to_list(None)
+        return orjson.dumps(vehicles)
+    
+    # Only known routes get a cache entry, so arbitrary route_id values cannot grow the cache
+    if route_id and route_id not in await get_cached_routes():
+        database_queries.incr()
+        return Response(await build(), media_type="application/json")
+    
+    return await cached_json_response(("vehicles", route_id), build)
 
 @api_router.get("/vehicles/{vehicle_id}/track")
 async def track_vehicle(vehicle_id: str, duration: int = 300):
     """Get vehicle tracking history and prediction"""
-    global system_metrics
-    system_metrics['api_requests'] += 1
-    system_metrics['database_queries'] += 1
+    api_requests.incr()
+    database_queries.incr()
     
     vehicle = await db.vehicles.find_one({"id": vehicle_id})
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
-    route = await db.routes.find_one({"id": vehicle['route_id']})
+    await get_cached_routes()
+    geometry = route_geometry.get(vehicle['route_id'])
     
     # Simulate tracking history and predictions
     current_pos = vehicle['location']['coordinates']
@@ -444,31 +919,32 @@ async def track_vehicle(vehicle_id: str, duration: int = 300):
         "route_progress": random.uniform(0.1, 0.9)
     }
     
-    # Generate predicted positions
-    if route:
-        route_coords = route['coordinates']
-        for i in range(5):  # Next 5 positions
-            pred_pos = get_next_position(current_pos, route_coords, vehicle['speed'])
-            tracking_data['predicted_positions'].append(pred_pos)
-            current_pos = pred_pos
+    # Generate predicted positions (next 5 ticks) from the vehicle's distance along its route
+    if geometry:
+        fleet = vehicle_positions
+        row = fleet.index.get(vehicle_id)
+        if row is not None and fleet.route_id[row] == vehicle['route_id'] and not np.isnan(fleet.s_along[row]):
+            progress = fleet.s_along[row]
+        else:
+            progress = locate_on_route(np.array([current_pos], dtype=np.float64), geometry)[0]
+        tracking_data['predicted_positions'] = predict_positions(progress, vehicle['speed'], geometry, 5)
     
     return tracking_data
 
 @api_router.get("/health")
 async def health_check():
-    global system_metrics
-    system_metrics['api_requests'] += 1
+    api_requests.incr()
     
     try:
         # Test database connection
-        start_time = datetime.now()
-        await db.vehicles.count_documents({})
-        db_response_time = (datetime.now() - start_time).total_seconds() * 1000
+        start_time = time.perf_counter()
+        await db.vehicles.estimated_document_count()
+        db_response_time = (time.perf_counter() - start_time) * 1000
         
-        # Get counts
-        total_routes = await db.routes.count_documents({})
-        total_stops = await db.bus_stops.count_documents({})
-        active_vehicles = await db.vehicles.count_documents({"status": "active"})
+        # Get counts (totals come from collection metadata, active vehicles from the updater)
+        total_routes = await db.routes.estimated_document_count()
+        total_stops = await db.bus_stops.estimated_document_count()
+        active_vehicles = system_metrics['active_vehicles']
         
         # Calculate uptime
         uptime_delta = datetime.now(timezone.utc) - system_metrics['system_uptime']
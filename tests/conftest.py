@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# server.py reads its database settings at import time; the client connects lazily,
+# so the pure helpers can be tested without a running MongoDB
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "nagaratrack_test")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
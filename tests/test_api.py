@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+
+import server
+
+# No `with` block: the lifespan (database seeding, background tasks) never runs
+client = TestClient(server.app)
+
+
+def test_stops_limit_out_of_range_is_rejected():
+    for limit in (0, -5, server.MAX_STOPS_LIMIT + 1):
+        response = client.get("/api/stops", params={"limit": limit})
+        assert response.status_code == 422, limit
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import server
+from server import advance_vehicles, build_route_geometry, cheap_ruler_scale, locate_on_route, predict_positions
+
+# Unit square walked north, east, south, then back west to the start: perimeter 4
+SQUARE = [[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [1.0, 0.0]]
+
+# Speed (km/h) that moves a vehicle half a degree along its route per 2 s tick
+HALF_DEGREE_SPEED = 0.5 / server.SPEED_TO_DEG_PER_TICK
+
+
+@pytest.fixture
+def square():
+    return build_route_geometry(SQUARE)
+
+
+def test_build_route_geometry_closes_the_loop(square):
+    assert square["coords"].shape == (5, 2)
+    np.testing.assert_array_equal(square["coords"][-1], square["coords"][0])
+    np.testing.assert_allclose(square["cum"], [0, 1, 2, 3, 4])
+    np.testing.assert_allclose(square["bearings"], [0, 90, 180, 270])
+
+
+def test_locate_on_route_projects_onto_nearest_segment(square):
+    points = np.array([[0.5, 1.1], [-0.2, 0.25], [1.0, 0.5]])
+    np.testing.assert_allclose(locate_on_route(points, square), [1.5, 0.25, 2.5])
+
+
+def test_cheap_ruler_scale():
+    np.testing.assert_allclose(cheap_ruler_scale(0), (111.32, 110.57))
+    np.testing.assert_allclose(cheap_ruler_scale(60), (55.66, 110.57))
+
+
+def test_locate_on_route_scales_longitude_at_high_latitude():
+    # A degree of longitude is half as long as a degree of latitude at 60N, so
+    # the point is nearer the western edge than the southern one
+    geometry = build_route_geometry([[0.0, 60.0], [0.0, 61.0], [1.0, 61.0], [1.0, 60.0]])
+    np.testing.assert_allclose(locate_on_route(np.array([[0.45, 60.4]]), geometry), [0.4], atol=1e-9)
+
+def test_advance_vehicles_snaps_unknown_progress_then_moves():
+    current = np.array([[0.0, 0.25]])
+    coords, bearings, progress, moved = advance_vehicles(
+        current, np.array([np.nan]), np.array([HALF_DEGREE_SPEED]), np.array(["r"]),
+        {"r": build_route_geometry(SQUARE)}
+    )
+    np.testing.assert_allclose(progress, [0.75])
+    np.testing.assert_allclose(coords, [[0.0, 0.75]])
+    np.testing.assert_allclose(bearings, [0.0])
+    assert moved.all()
+    # Inputs are left untouched
+    np.testing.assert_array_equal(current, [[0.0, 0.25]])
+
+
+def test_advance_vehicles_wraps_around_the_loop(square):
+    coords, bearings, progress, _ = advance_vehicles(
+        np.array([[0.0, 0.25]]), np.array([3.75]), np.array([HALF_DEGREE_SPEED]), np.array(["r"]), {"r": square}
+    )
+    np.testing.assert_allclose(progress, [0.25])
+    np.testing.assert_allclose(coords, [[0.0, 0.25]])
+    np.testing.assert_allclose(bearings, [0.0])
+
+
+def test_advance_vehicles_handles_zero_length_route():
+    geometry = build_route_geometry([[5.0, 5.0], [5.0, 5.0]])
+    coords, _, progress, moved = advance_vehicles(
+        np.array([[5.1, 5.1]]), np.array([np.nan]), np.array([30.0]), np.array(["z"]), {"z": geometry}
+    )
+    np.testing.assert_allclose(progress, [0.0])
+    np.testing.assert_allclose(coords, [[5.0, 5.0]])
+    assert moved.all()
+
+
+def test_advance_vehicles_leaves_vehicles_without_geometry_in_place(square):
+    current = np.array([[0.0, 0.25], [3.0, 3.0]])
+    coords, _, progress, moved = advance_vehicles(
+        current, np.array([0.25, np.nan]), np.array([HALF_DEGREE_SPEED] * 2), np.array(["r", "missing"]),
+        {"r": square}
+    )
+    np.testing.assert_array_equal(moved, [True, False])
+    np.testing.assert_array_equal(coords[1], [3.0, 3.0])
+    assert np.isnan(progress[1])
+
+
+def test_predict_positions_steps_and_wraps(square):
+    predicted = predict_positions(3.0, HALF_DEGREE_SPEED, square, 3)
+    np.testing.assert_allclose(predicted, [[0.5, 0.0], [0.0, 0.0], [0.0, 0.5]])
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+import server
+from server import nearby_stops_pipeline, plan_uses_index
+
+GEO_PLAN = {
+    "stages": [
+        {"$geoNearCursor": {"queryPlanner": {"winningPlan": {"stage": "GEO_NEAR_2DSPHERE", "indexName": "location_2dsphere"}}}}
+    ]
+}
+SCAN_PLAN = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+
+class FakeDatabase:
+    def __init__(self, plan):
+        self.plan = plan
+        self.commands = []
+
+    async def command(self, name, spec, **kwargs):
+        self.commands.append((name, spec, kwargs))
+        return self.plan
+
+
+def test_nearby_stops_pipeline_uses_geo_near_and_limit():
+    geo_near, limit = nearby_stops_pipeline(72.8, 19.0, 500)
+    assert geo_near["$geoNear"]["near"] == {"type": "Point", "coordinates": [72.8, 19.0]}
+    assert geo_near["$geoNear"]["maxDistance"] == 500
+    assert geo_near["$geoNear"]["key"] == "location"
+    assert limit == {"$limit": server.NEARBY_STOPS_LIMIT}
+
+
+def test_plan_uses_index_searches_nested_plans():
+    assert plan_uses_index(GEO_PLAN, "location_2dsphere")
+    assert not plan_uses_index(GEO_PLAN, "id_1")
+    assert not plan_uses_index(SCAN_PLAN, "location_2dsphere")
+
+
+def test_verify_query_indexes_logs_each_unindexed_query(monkeypatch, caplog):
+    fake = FakeDatabase(GEO_PLAN)
+    monkeypatch.setattr(server, "db", fake)
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(server.verify_query_indexes())
+    assert [spec.get("aggregate", spec.get("find")) for _, spec, _ in fake.commands] == ["bus_stops", "vehicles", "vehicles"]
+    assert "Nearby stops" not in caplog.text
+    assert "Active vehicles query is not using the status_1 index" in caplog.text
+    assert "Vehicles by route query is not using the route_id_1 index" in caplog.text
+
+
+def test_verify_query_indexes_reports_explain_failures(monkeypatch, caplog):
+    async def failing_command(*args, **kwargs):
+        raise RuntimeError("explain failed")
+
+    fake = FakeDatabase(None)
+    fake.command = failing_command
+    monkeypatch.setattr(server, "db", fake)
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(server.verify_query_indexes())
+    assert caplog.text.count("explain failed") == 3
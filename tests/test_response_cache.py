@@ -0,0 +1,102 @@
+import asyncio
+import collections
+
+import pytest
+
+import server
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(server, "response_cache", {})
+    monkeypatch.setattr(server, "response_cache_locks", {})
+    monkeypatch.setattr(server, "response_cache_generation", collections.Counter())
+    monkeypatch.setattr(server, "database_queries", server.RequestCounter())
+
+
+def counting_build(body=b"[]", delay=0.0):
+    calls = []
+
+    async def build():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        return body
+
+    return build, calls
+
+
+def test_concurrent_requests_build_once():
+    build, calls = counting_build(delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*(server.cached_json_response(("stops", 100), build) for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(response.body == b"[]" for response in responses)
+    assert server.database_queries.drain() == 1
+
+
+def test_expired_entry_is_rebuilt(monkeypatch):
+    build, calls = counting_build()
+    asyncio.run(server.cached_json_response(("stops", 100), build))
+    monkeypatch.setitem(server.response_cache, ("stops", 100), (0.0, b"stale"))
+    response = asyncio.run(server.cached_json_response(("stops", 100), build))
+    assert len(calls) == 2
+    assert response.body == b"[]"
+
+
+def test_invalidate_responses_drops_only_that_endpoint():
+    server.response_cache.update({("stops", 100): (1e18, b"s"), ("stops", 5): (1e18, b"s"), ("routes",): (1e18, b"r")})
+    server.invalidate_responses("stops")
+    assert list(server.response_cache) == [("routes",)]
+
+
+def test_keys_are_built_independently():
+    stops, stop_calls = counting_build(b"stops", delay=0.01)
+    routes, route_calls = counting_build(b"routes", delay=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            server.cached_json_response(("stops", 100), stops),
+            server.cached_json_response(("routes",), routes),
+        )
+
+    responses = asyncio.run(run())
+    assert [response.body for response in responses] == [b"stops", b"routes"]
+    assert len(stop_calls) == len(route_calls) == 1
+    assert set(server.response_cache_locks) == {("stops", 100), ("routes",)}
+
+
+def test_expired_entries_and_idle_locks_are_evicted_on_write():
+    server.response_cache.update({("vehicles", "r1"): (0.0, b"old"), ("vehicles", "r2"): (0.0, b"old")})
+    busy = asyncio.Lock()
+    server.response_cache_locks.update({("vehicles", "r1"): asyncio.Lock(), ("vehicles", "r2"): busy})
+
+    async def run():
+        async with busy:
+            await server.cached_json_response(("stops", 100), counting_build()[0])
+
+    asyncio.run(run())
+    assert set(server.response_cache) == {("stops", 100)}
+    # A lock still held by a rebuild is kept so waiters keep sharing it
+    assert set(server.response_cache_locks) == {("stops", 100), ("vehicles", "r2")}
+
+
+def test_invalidation_during_rebuild_is_not_overwritten():
+    async def build():
+        # A change stream event lands while the body is being built
+        server.invalidate_responses("stops")
+        return b"stale"
+
+    fresh, calls = counting_build(b"fresh")
+
+    async def run():
+        first = await server.cached_json_response(("stops", 100), build)
+        second = await server.cached_json_response(("stops", 100), fresh)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.body == b"stale"
+    assert ("stops", 100) in server.response_cache and second.body == b"fresh"
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from server import RequestCounter, VehicleState, timestamp_ms
+
+
+def vehicle(vid, lng=0.0, route_id="r", speed=20.0, timestamp=None):
+    return {
+        "id": vid,
+        "location": {"type": "Point", "coordinates": [lng, 1.0]},
+        "speed": speed,
+        "bearing": 90.0,
+        "occupancy": 3,
+        "route_id": route_id,
+        "timestamp": timestamp,
+    }
+
+
+def test_vehicle_state_grows_past_capacity():
+    fleet = VehicleState(capacity=2)
+    for i in range(5):
+        fleet.add(vehicle(f"v{i}", lng=float(i)))
+    assert len(fleet) == 5
+    assert len(fleet.speed) == 8
+    np.testing.assert_array_equal(fleet.pos_xy[:5, 0], [0, 1, 2, 3, 4])
+    assert list(fleet.route_id[:5]) == ["r"] * 5
+    assert np.isnan(fleet.s_along[:5]).all()
+
+
+def test_vehicle_state_add_reloads_existing_row():
+    fleet = VehicleState()
+    fleet.add(vehicle("a"))
+    fleet.s_along[0] = 1.5
+    fleet.add(vehicle("a", route_id="other", speed=40.0))
+    assert len(fleet) == 1
+    assert fleet.route_id[0] == "other"
+    assert fleet.speed[0] == 40.0
+    assert np.isnan(fleet.s_along[0])
+
+
+def test_vehicle_state_retain_compacts_and_reindexes():
+    fleet = VehicleState()
+    for i in range(4):
+        fleet.add(vehicle(f"v{i}", lng=float(i)))
+    fleet.retain(["v3", "v1", "unknown"])
+    assert fleet.ids == ["v1", "v3"]
+    assert fleet.index == {"v1": 0, "v3": 1}
+    np.testing.assert_array_equal(fleet.pos_xy[:2, 0], [1, 3])
+    fleet.retain([])
+    assert len(fleet) == 0 and fleet.index == {}
+
+
+def test_vehicle_state_is_stale_on_route_or_timestamp_change():
+    stamp = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    fleet = VehicleState()
+    fleet.add(vehicle("a", timestamp=stamp))
+    # MongoDB hands the timestamp back naive and truncated to milliseconds
+    same = {"id": "a", "route_id": "r", "timestamp": datetime(2025, 1, 1, 12, 0, 0, 123000)}
+    assert not fleet.is_stale(same)
+    assert fleet.is_stale(dict(same, route_id="other"))
+    assert fleet.is_stale(dict(same, timestamp=datetime(2025, 1, 1, 12, 0, 1)))
+
+
+def test_timestamp_ms():
+    assert timestamp_ms(None) == -1
+    assert timestamp_ms(datetime(1970, 1, 1, 0, 0, 1, 999999)) == 1999
+    assert timestamp_ms(datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)) == 1000
+
+
+def test_request_counter_drain():
+    counter = RequestCounter()
+    assert counter.drain() == 0
+    counter.incr()
+    counter.incr(3)
+    assert counter.drain() == 4
+    assert counter.drain() == 0
+    counter.incr(2)
+    assert counter.drain() == 2
+
+
+def test_vehicle_state_keeps_long_route_ids_intact():
+    long_id = "route-" + "x" * 40
+    fleet = VehicleState(capacity=1)
+    fleet.add(vehicle("a", route_id=long_id))
+    fleet.add(vehicle("b", route_id="r"))
+    assert fleet.route_id[0] == long_id
+    assert not fleet.is_stale({"id": "a", "route_id": long_id, "timestamp": None})
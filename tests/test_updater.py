@@ -0,0 +1,38 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+import server
+
+
+class FakeLeases:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    async def find_one_and_update(self, filter, update, **kwargs):
+        self.calls.append((filter, update, kwargs))
+        if self.error is not None:
+            raise self.error
+
+
+class FakeDatabase:
+    def __init__(self, leases):
+        self.leases = leases
+
+
+def test_acquire_updater_lease_takes_free_or_own_lease(monkeypatch):
+    leases = FakeLeases()
+    monkeypatch.setattr(server, "db", FakeDatabase(leases))
+    assert asyncio.run(server.acquire_updater_lease())
+    filter, update, kwargs = leases.calls[0]
+    assert filter["_id"] == "vehicle_updater"
+    assert {"owner": server.UPDATER_LEASE_ID} in filter["$or"]
+    assert any("$lt" in clause.get("expires", {}) for clause in filter["$or"])
+    assert update["$set"]["owner"] == server.UPDATER_LEASE_ID
+    assert kwargs == {"upsert": True}
+
+
+def test_acquire_updater_lease_fails_while_held_elsewhere(monkeypatch):
+    monkeypatch.setattr(server, "db", FakeDatabase(FakeLeases(DuplicateKeyError("E11000"))))
+    assert not asyncio.run(server.acquire_updater_lease())
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+from pymongo.errors import OperationFailure
+
+import server
+
+STANDALONE = OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+
+class FakeStream:
+    def __init__(self, events, error):
+        self.events = list(events)
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.events:
+            return self.events.pop(0)
+        raise self.error
+
+
+class FakeCollection:
+    """Each watch() call plays the next (events, error) pair; an open error is raised by watch() itself"""
+    name = "routes"
+
+    def __init__(self, *sessions):
+        self.sessions = list(sessions)
+
+    def watch(self):
+        events, error = self.sessions.pop(0)
+        if events is None:
+            raise error
+        return FakeStream(events, error)
+
+
+def run_watcher(collection):
+    changes = []
+
+    async def on_change():
+        changes.append(None)
+
+    asyncio.run(asyncio.wait_for(server.watch_collection(collection, on_change), 1))
+    return changes
+
+
+def test_watch_collection_gives_up_on_standalone_server(caplog):
+    with caplog.at_level(logging.WARNING):
+        assert run_watcher(FakeCollection((None, STANDALONE))) == []
+    assert "falling back to TTL refresh" in caplog.text
+
+
+def test_watch_collection_reopens_dropped_streams(monkeypatch, caplog):
+    monkeypatch.setattr(server, "WATCH_RETRY_SECONDS", 0)
+    collection = FakeCollection(
+        (None, ConnectionError("not reachable")),
+        (["insert", "update"], ConnectionError("stream dropped")),
+        (None, STANDALONE),
+    )
+    with caplog.at_level(logging.WARNING):
+        changes = run_watcher(collection)
+    # One catch-up refresh on reopening, then one per event
+    assert len(changes) == 3
+    assert collection.sessions == []
+    assert caplog.text.count("retrying") == 2